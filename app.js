@@ -30,10 +30,141 @@ document.addEventListener("DOMContentLoaded", () => {
     const tabContents = document.querySelectorAll('.tab-content');
     const nutritionGrid = document.querySelector('.nutrition-grid');
 
+    // Identifies this browser to the server's rate limiter, so users sharing an IP get separate budgets
+    const clientId = getClientId();
+
+    function getClientId() {
+        const newId = () => window.crypto && crypto.randomUUID ? crypto.randomUUID() : String(Math.random()).slice(2);
+        try {
+            let id = localStorage.getItem('fooderatorClientId');
+            if (!id) {
+                id = newId();
+                localStorage.setItem('fooderatorClientId', id);
+            }
+            return id;
+        } catch (error) {
+            return newId();
+        }
+    }
+
     // Camera state
     let scanning = false;
     let stream = null;
     let scanInterval = null;
+    let scanInFlight = false;
+    let localFailures = 0;
+    let serverBackoffUntil = 0;
+    let scanSessionId = null;
+
+    // Send a frame to the server only after this many failed on-device decodes (~3s at 300ms)
+    const LOCAL_FAILURES_BEFORE_SERVER = 10;
+
+    // Use the browser's native BarcodeDetector when it supports product barcode formats
+    const PRODUCT_FORMATS = ['ean_13', 'ean_8', 'upc_a', 'upc_e', 'code_128', 'code_39', 'itf', 'qr_code'];
+    const barcodeDetectorPromise = createBarcodeDetector();
+
+    async function createBarcodeDetector() {
+        if (!('BarcodeDetector' in window)) {
+            return null;
+        }
+        try {
+            const supported = await window.BarcodeDetector.getSupportedFormats();
+            const formats = PRODUCT_FORMATS.filter(format => supported.includes(format));
+            return formats.length > 0 ? new window.BarcodeDetector({ formats }) : null;
+        } catch (error) {
+            console.warn('BarcodeDetector unavailable:', error);
+            return null;
+        }
+    }
+
+    // Decode locally, returning the first barcode value or null
+    async function detectLocally(source) {
+        const detector = await barcodeDetectorPromise;
+        if (!detector) {
+            return null;
+        }
+        try {
+            const barcodes = await detector.detect(source);
+            return barcodes.length > 0 ? barcodes[0].rawValue.trim() : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
+    // Offline cache of recently viewed products, keyed by "barcode|lang"
+    const PRODUCT_CACHE_MAX_ENTRIES = 200;
+    let currentProductKey = null;
+    const productCache = createProductCache();
+
+    function createProductCache() {
+        const dbPromise = new Promise((resolve) => {
+            if (!('indexedDB' in window)) {
+                resolve(null);
+                return;
+            }
+            const request = indexedDB.open('fooderator', 1);
+            request.onupgradeneeded = () => {
+                const store = request.result.createObjectStore('products', { keyPath: 'key' });
+                store.createIndex('accessed', 'accessed');
+            };
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => resolve(null);
+        });
+
+        function run(mode, operation) {
+            return dbPromise.then(db => new Promise((resolve) => {
+                if (!db) {
+                    resolve(null);
+                    return;
+                }
+                const tx = db.transaction('products', mode);
+                const result = operation(tx.objectStore('products'));
+                tx.oncomplete = () => resolve(result.value);
+                tx.onerror = () => resolve(null);
+                tx.onabort = () => resolve(null);
+            }));
+        }
+
+        return {
+            get(key) {
+                return run('readwrite', (store) => {
+                    const result = { value: null };
+                    const request = store.get(key);
+                    request.onsuccess = () => {
+                        const entry = request.result;
+                        if (entry) {
+                            result.value = entry.product;
+                            // Touch the entry so eviction drops the least recently used
+                            entry.accessed = Date.now();
+                            store.put(entry);
+                        }
+                    };
+                    return result;
+                });
+            },
+            put(key, product) {
+                return run('readwrite', (store) => {
+                    store.put({ key, product, accessed: Date.now() });
+                    const countRequest = store.count();
+                    countRequest.onsuccess = () => {
+                        let excess = countRequest.result - PRODUCT_CACHE_MAX_ENTRIES;
+                        if (excess <= 0) {
+                            return;
+                        }
+                        store.index('accessed').openCursor().onsuccess = (event) => {
+                            const cursor = event.target.result;
+                            if (cursor && excess > 0) {
+                                cursor.delete();
+                                excess--;
+                                cursor.continue();
+                            }
+                        };
+                    };
+                    return { value: null };
+                });
+            }
+        };
+    }
 
     // Camera access handler with better configuration
     cameraBtn.addEventListener('click', async () => {
@@ -66,6 +197,8 @@ document.addEventListener("DOMContentLoaded", () => {
     // Continuous scanning function
     function startContinuousScanning() {
         scanning = true;
+        // Lets the server skip frames that haven't changed since its last failed decode
+        scanSessionId = window.crypto && crypto.randomUUID ? crypto.randomUUID() : String(Math.random()).slice(2);
         captureBtn.textContent = '🔍 Scanning...';
         captureBtn.disabled = true;
         
@@ -77,53 +210,102 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     // Scan a single frame
-    function scanFrame() {
+    async function scanFrame() {
+        // Skip this tick while the previous frame is still being decoded
+        if (scanInFlight) {
+            return;
+        }
+        scanInFlight = true;
+        try {
+            const detector = await barcodeDetectorPromise;
+            if (detector) {
+                const barcode = await detectLocally(video);
+                if (barcode) {
+                    onBarcodeFound(barcode);
+                    return;
+                }
+                // Fall back to the server only after repeated local failures
+                localFailures++;
+                if (localFailures < LOCAL_FAILURES_BEFORE_SERVER) {
+                    return;
+                }
+                localFailures = 0;
+            }
+            // Respect the server's Retry-After while rate limited
+            if (Date.now() < serverBackoffUntil) {
+                return;
+            }
+            const barcode = await scanFrameOnServer();
+            if (barcode) {
+                onBarcodeFound(barcode);
+            }
+        } finally {
+            scanInFlight = false;
+        }
+    }
+
+    // Send the current video frame to the server decoder
+    function scanFrameOnServer() {
         const context = canvas.getContext('2d');
         canvas.width = video.videoWidth;
         canvas.height = video.videoHeight;
         context.drawImage(video, 0, 0, canvas.width, canvas.height);
         
-        canvas.toBlob(async (blob) => {
-            const imageUrl = URL.createObjectURL(blob);
-            const base64Image = await convertImageToBase64(imageUrl);
-            
-            // Try to detect barcode
-            try {
-                const response = await fetch('/api/scan-barcode', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify({ image: base64Image })
-                });
-                
-                if (response.ok) {
-                    const result = await response.json();
-                    if (result.barcode) {
-                        // Barcode found!
-                        stopScanning();
-                        // Visual feedback
-                        captureBtn.textContent = '✅ Barcode Found!';
-                        captureBtn.style.backgroundColor = '#4CAF50';
-                        
-                        // Fetch product after short delay
-                        setTimeout(() => {
-                            fetchProduct(result.barcode);
-                            closeModal();
-                        }, 1000);
+        return new Promise((resolve) => {
+            canvas.toBlob(async (blob) => {
+                const imageUrl = URL.createObjectURL(blob);
+                try {
+                    const base64Image = await convertImageToBase64(imageUrl);
+                    const response = await fetch('/api/scan-barcode', {
+                        method: 'POST',
+                        headers: {
+                            'Content-Type': 'application/json',
+                            'X-Client-Id': clientId
+                        },
+                        body: JSON.stringify({ image: base64Image, session: scanSessionId })
+                    });
+                    
+                    if (response.ok) {
+                        const result = await response.json();
+                        resolve(result.barcode || null);
+                        return;
+                    }
+                    if (response.status === 429) {
+                        const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 1;
+                        serverBackoffUntil = Date.now() + retryAfter * 1000;
                     }
+                    resolve(null);
+                } catch (error) {
+                    // Continue scanning if error
+                    resolve(null);
+                } finally {
+                    URL.revokeObjectURL(imageUrl);
                 }
-            } catch (error) {
-                // Continue scanning if error
-            }
-            
-            URL.revokeObjectURL(imageUrl);
-        }, 'image/jpeg', 0.8);
+            }, 'image/jpeg', 0.8);
+        });
+    }
+
+    function onBarcodeFound(barcode) {
+        if (!scanning) {
+            return;
+        }
+        // Barcode found!
+        stopScanning();
+        // Visual feedback
+        captureBtn.textContent = '✅ Barcode Found!';
+        captureBtn.style.backgroundColor = '#4CAF50';
+        
+        // Fetch product after short delay
+        setTimeout(() => {
+            fetchProduct(barcode);
+            closeModal();
+        }, 1000);
     }
 
     // Stop continuous scanning
     function stopScanning() {
         scanning = false;
+        localFailures = 0;
         if (scanInterval) {
             clearInterval(scanInterval);
             scanInterval = null;
@@ -209,13 +391,35 @@ document.addEventListener("DOMContentLoaded", () => {
         });
     }
 
+    // Decode a still image on-device; null if unsupported or the browser can't read it
+    async function detectImageLocally(base64Image) {
+        if (!(await barcodeDetectorPromise)) {
+            return null;
+        }
+        try {
+            const image = new Image();
+            image.src = base64Image;
+            await image.decode();
+            return await detectLocally(image);
+        } catch (error) {
+            return null;
+        }
+    }
+
     async function processImage(base64Image) {
         showLoading();
         try {
+            // Try the on-device decoder first; still images always fall back to the server
+            const localBarcode = await detectImageLocally(base64Image);
+            if (localBarcode) {
+                fetchProduct(localBarcode);
+                return;
+            }
             const response = await fetch('/api/scan-barcode', {
                 method: 'POST',
                 headers: {
-                    'Content-Type': 'application/json'
+                    'Content-Type': 'application/json',
+                    'X-Client-Id': clientId
                 },
                 body: JSON.stringify({ image: base64Image })
             });
@@ -229,23 +433,93 @@ document.addEventListener("DOMContentLoaded", () => {
     }
 
     async function fetchProduct(barcode) {
-        showLoading();
         const language = languageSelect.value;
+        const key = `${barcode}|${language}`;
+        currentProductKey = key;
+        
+        // Serve a cached copy immediately and revalidate it in the background
+        const cached = await productCache.get(key);
+        if (cached) {
+            displayProduct(cached);
+            fetchProductFromNetwork(barcode, language, key)
+                .then(product => {
+                    if (currentProductKey === key && JSON.stringify(product) !== JSON.stringify(cached)) {
+                        displayProduct(product);
+                    }
+                })
+                .catch(() => {
+                    // Keep showing the cached copy when offline
+                });
+            return;
+        }
+        
+        showLoading();
         try {
-            const response = await fetch(`/api/product/${barcode}?lang=${language}`);
-            if (!response.ok) throw new Error('Product not found');
-            const product = await response.json();
-            displayProduct(product);
+            const product = await fetchProductFromNetwork(barcode, language, key);
+            if (currentProductKey === key) {
+                displayProduct(product);
+            }
         } catch (error) {
             showError(error.message);
         }
     }
 
+    async function fetchProductFromNetwork(barcode, language, key) {
+        // Compact responses leave out nutrition_labels; they're fetched once per language
+        const [response, labels] = await Promise.all([
+            fetchWithRetryAfter(`/api/product/${barcode}?lang=${language}&compact=1`),
+            getNutritionLabels(language)
+        ]);
+        if (response.status === 429) throw new Error('Too many requests. Please try again in a moment.');
+        if (response.status === 404) throw new Error('Product not found');
+        if (!response.ok) throw new Error('Failed to load product');
+        const product = await response.json();
+        if (labels) {
+            product.nutrition_labels = labels;
+        }
+        productCache.put(key, product);
+        return product;
+    }
+
+    // Wait out the server's Retry-After on 429 instead of failing the lookup
+    async function fetchWithRetryAfter(url, attempts = 3) {
+        for (let attempt = 1; ; attempt++) {
+            const response = await fetch(url, { headers: { 'X-Client-Id': clientId } });
+            if (response.status !== 429 || attempt >= attempts) {
+                return response;
+            }
+            const retryAfter = parseInt(response.headers.get('Retry-After'), 10) || 1;
+            await new Promise(resolve => setTimeout(resolve, Math.min(retryAfter, 10) * 1000));
+        }
+    }
+
+    const nutritionLabelRequests = {};
+
+    function getNutritionLabels(language) {
+        if (language === 'en') {
+            return Promise.resolve(null);
+        }
+        if (!nutritionLabelRequests[language]) {
+            nutritionLabelRequests[language] = fetch(`/api/nutrition-labels?lang=${language}`)
+                .then(response => response.ok ? response.json() : null)
+                .catch(() => null)
+                .then(labels => {
+                    // Retry on the next lookup if the labels couldn't be fetched
+                    if (!labels) {
+                        delete nutritionLabelRequests[language];
+                    }
+                    return labels;
+                });
+        }
+        return nutritionLabelRequests[language];
+    }
+
     function displayProduct(product) {
         hideLoading();
         resultsElement.style.display = 'block';
         // Set product image
-        productImage.src = product.image_url || 'default-product.png';
+        // Prefer the resized thumbnail served by /api/image over the full-size upstream image
+        productImage.src = product.thumbnail_url || product.image_url || 'default-product.png';
         productImage.alt = product.name;
         // Set product info
         productName.textContent = product.name || 'Unknown Product';
@@ -459,5 +733,12 @@ document.addEventListener("DOMContentLoaded", () => {
         resultsElement.style.display = 'none';
         errorMessage.textContent = message;
     }
+
+    // Precache the app shell so repeat visits start instantly
+    if ('serviceWorker' in navigator) {
+        navigator.serviceWorker.register('/sw.js').catch(error => {
+            console.warn('Service worker registration failed:', error);
+        });
+    }
 });
 
@@ -1,6 +1,8 @@
-from flask import Flask, jsonify, request, render_template, send_from_directory
+from flask import Flask, jsonify, request, render_template, send_from_directory, g
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
 from deep_translator import GoogleTranslator
+from deep_translator.constants import GOOGLE_LANGUAGES_TO_CODES
 import base64
 import io
 from PIL import Image
@@ -10,7 +12,44 @@ from pyzbar import pyzbar
 import requests
 import json
 import os
+import re
+import time
+import hashlib
+import tempfile
+import threading
+import gzip
+import hmac
+import uuid
+import pstats
+import cProfile
+import contextvars
+from contextlib import contextmanager, nullcontext
+from collections import deque
+from collections import OrderedDict
+from functools import lru_cache, partial
+from urllib.parse import urlparse, quote
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from search_index import ProductSearchIndex
+from scan_frames import FrameSignature, ScanSessionFrames
+from ingredients import TranslationMemory, translate_ingredients
+from rate_limit import MemoryTokenBuckets, RedisTokenBuckets, request_cost, take_tokens, retry_after_header
+
+try:
+    import gevent
+    from gevent import monkey as gevent_monkey
+except ImportError:
+    gevent = None
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 load_dotenv()
 USDA_API_KEY = os.getenv('USDA_API_KEY')
@@ -18,11 +57,93 @@ USDA_API_KEY = os.getenv('USDA_API_KEY')
 app = Flask(__name__, static_folder='.', static_url_path='')
 CORS(app)
 
+# Compact, UTF-8 JSON: escaping translated text as \uXXXX can triple its size
+app.json.compact = True
+app.json.ensure_ascii = False
+app.json.sort_keys = False
+
+# Behind a load balancer (e.g. Render, PROXY_COUNT=1), trust that many X-Forwarded-For
+# hops so rate limits apply per real client. Off by default: without a proxy in
+# front, any client could set the header and pick its own IP.
+PROXY_COUNT = int(os.getenv('PROXY_COUNT', '0'))
+if PROXY_COUNT:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_COUNT)
+
 # No need to initialize translator globally with deep-translator
 
 # OpenFoodFacts API endpoint
 OPENFOODFACTS_API = "https://world.openfoodfacts.org/api/v0/product/"
 
+# Batch scanning limits
+MAX_BATCH_IMAGES = int(os.getenv('MAX_BATCH_IMAGES', '10'))
+MAX_LOOKUP_BARCODES = int(os.getenv('MAX_LOOKUP_BARCODES', '20'))  # unique codes resolved per "lookup" request
+SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', '4'))
+
+# Product image proxy: resized variants cached on local disk with LRU eviction
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'fooderator-images'))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_CACHE_MAX_BYTES', str(200 * 1024 * 1024)))
+IMAGE_WIDTHS = (100, 200, 400)
+IMAGE_THUMBNAIL_WIDTH = 200
+# Exact hosts only: other openfoodfacts subdomains serve multi-GB data dumps
+IMAGE_PROXY_HOSTS = ('images.openfoodfacts.org', 'images.openfoodfacts.net')
+IMAGE_MAX_BYTES = 5 * 1024 * 1024
+IMAGE_MAX_PIXELS = 40_000_000
+image_cache_lock = threading.Lock()
+image_cache_entries = None  # path -> size, least recently used first; loaded on first use
+image_cache_bytes = 0
+
+# Local product search: a JSON-lines catalog shared by every worker, appended to as
+# new products are resolved and re-read before each search. Set it to an empty
+# string to keep each worker's index in its own memory only.
+SEARCH_CATALOG_PATH = os.getenv('SEARCH_CATALOG_PATH', 'search_catalog.jsonl') or None
+SEARCH_MAX_RESULTS = 50
+
+# Continuous scanning: skip frames that barely differ from the session's last failed decode
+FRAME_DIFF_THRESHOLD = float(os.getenv('FRAME_DIFF_THRESHOLD', '3.0'))
+FRAME_SHARPNESS_CHANGE = float(os.getenv('FRAME_SHARPNESS_CHANGE', '0.2'))
+FRAME_MAX_SKIP_SECONDS = 2.0
+MAX_SCAN_SESSIONS = 5000
+
+# Per-ingredient translation memory shared by every product and worker
+TRANSLATION_MEMORY_PATH = os.getenv('TRANSLATION_MEMORY_PATH', 'translation_memory.sqlite')
+
+# On-demand request profiling: requests carrying X-Profile and a matching
+# X-Admin-Token are profiled and kept in a per-worker ring buffer
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+PROFILE_BUFFER_SIZE = int(os.getenv('PROFILE_BUFFER_SIZE', '50'))
+PROFILE_TOP_FUNCTIONS = 40
+
+# Compress JSON responses larger than this many bytes
+COMPRESS_MIN_BYTES = 500
+
+# Per-client token buckets: each client refills RATE_LIMIT_RATE tokens/second up to
+# RATE_LIMIT_BURST, and each request to a limited endpoint spends its cost. The
+# defaults leave room for the web scanner's server fallback (one frame per 300ms)
+# plus the product lookup that follows a hit. Clients are told apart by IP plus the
+# X-Client-Id the web app sends, so users behind one NAT get their own buckets;
+# every IP also has a bucket RATE_LIMIT_IP_MULTIPLIER times larger, so minting new
+# client ids doesn't lift the limit.
+# Set RATE_LIMIT_REDIS_URL to share buckets across workers and instances.
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') != '0'
+RATE_LIMIT_RATE = float(os.getenv('RATE_LIMIT_RATE', '5'))
+RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', '60'))
+RATE_LIMIT_IP_MULTIPLIER = float(os.getenv('RATE_LIMIT_IP_MULTIPLIER', '10'))
+RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL')
+RATE_LIMIT_COSTS = {
+    'scan_barcode': 1,
+    'scan_barcode_batch': 1,  # per image
+    'get_product': 4,  # also charged per unique barcode a scan with "lookup" resolves
+    'translate_text': 2,
+    'get_image': 1
+}
+
+# Cap on in-flight requests to the expensive endpoints, per worker process. Kept
+# below gunicorn's worker_connections (500) so cheap endpoints still get through
+# when a worker is saturated with lookups.
+MAX_CONCURRENT_EXPENSIVE = int(os.getenv('MAX_CONCURRENT_EXPENSIVE', '400'))
+CLIENT_ID_PATTERN = re.compile(r'^[A-Za-z0-9-]{1,64}$')
+EXPENSIVE_ENDPOINTS = {'scan_barcode', 'scan_barcode_batch', 'get_product', 'translate_text', 'get_image'}
+
 # Supported languages
 LANGUAGES = {
     'en': 'English',
@@ -39,6 +160,293 @@ LANGUAGES = {
     'ru': 'Russian'
 }
 
+# English nutrition labels, translated once per language by get_nutrition_labels
+NUTRITION_LABELS = {
+    'energy': 'Calories',
+    'energy_kj': 'Energy (kJ)',
+    'fat': 'Total Fat',
+    'saturated_fat': 'Saturated Fat',
+    'monounsaturated_fat': 'Monounsaturated Fat',
+    'polyunsaturated_fat': 'Polyunsaturated Fat',
+    'trans_fat': 'Trans Fat',
+    'cholesterol': 'Cholesterol',
+    'carbohydrates': 'Total Carbohydrates',
+    'sugars': 'Sugars',
+    'added_sugars': 'Added Sugars',
+    'fiber': 'Dietary Fiber',
+    'proteins': 'Protein',
+    'salt': 'Salt',
+    'sodium': 'Sodium',
+    'potassium': 'Potassium',
+    'calcium': 'Calcium',
+    'iron': 'Iron',
+    'magnesium': 'Magnesium',
+    'phosphorus': 'Phosphorus',
+    'zinc': 'Zinc',
+    'copper': 'Copper',
+    'manganese': 'Manganese',
+    'selenium': 'Selenium',
+    'iodine': 'Iodine',
+    'vitamin_a': 'Vitamin A',
+    'vitamin_c': 'Vitamin C',
+    'vitamin_d': 'Vitamin D',
+    'vitamin_e': 'Vitamin E',
+    'vitamin_k': 'Vitamin K',
+    'vitamin_b1': 'Thiamin (B1)',
+    'vitamin_b2': 'Riboflavin (B2)',
+    'niacin': 'Niacin (B3)',
+    'vitamin_b6': 'Vitamin B6',
+    'folate': 'Folate',
+    'vitamin_b12': 'Vitamin B12',
+    'pantothenic_acid': 'Pantothenic Acid',
+    'biotin': 'Biotin',
+    'caffeine': 'Caffeine',
+    'alcohol': 'Alcohol'
+}
+
+IP_RATE_LIMIT_RATE = RATE_LIMIT_RATE * RATE_LIMIT_IP_MULTIPLIER
+IP_RATE_LIMIT_BURST = RATE_LIMIT_BURST * RATE_LIMIT_IP_MULTIPLIER
+
+if RATE_LIMIT_REDIS_URL and redis:
+    # Short timeouts so an unreachable Redis fails open quickly instead of stalling requests
+    redis_client = redis.Redis.from_url(RATE_LIMIT_REDIS_URL, socket_timeout=0.2, socket_connect_timeout=0.2)
+    rate_limiter = RedisTokenBuckets(redis_client, 'fooderator:ratelimit:', RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+    ip_rate_limiter = RedisTokenBuckets(redis_client, 'fooderator:ratelimit-ip:', IP_RATE_LIMIT_RATE, IP_RATE_LIMIT_BURST)
+else:
+    if RATE_LIMIT_REDIS_URL:
+        print("redis package not installed, using per-process rate limits")
+    rate_limiter = MemoryTokenBuckets(RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+    ip_rate_limiter = MemoryTokenBuckets(IP_RATE_LIMIT_RATE, IP_RATE_LIMIT_BURST)
+
+expensive_slots = threading.BoundedSemaphore(MAX_CONCURRENT_EXPENSIVE)
+
+def too_many_requests(message, retry_after):
+    response = jsonify({'error': message})
+    response.status_code = 429
+    response.headers['Retry-After'] = retry_after_header(retry_after)
+    return response
+
+def rate_limit_checks():
+    """The (buckets, key) pairs a request is charged against: its IP and its client"""
+    ip = request.remote_addr or 'unknown'
+    client_id = request.headers.get('X-Client-Id', '')
+    client = f"{ip}:{client_id}" if CLIENT_ID_PATTERN.match(client_id) else ip
+    return [(ip_rate_limiter, ip), (rate_limiter, client)]
+
+def charge_lookups(barcodes):
+    """Charge a scan's product lookups like the /api/product calls they replace
+
+    Returns a 429 response if the client can't afford them, otherwise None.
+    """
+    if not RATE_LIMIT_ENABLED:
+        return None
+    cost = RATE_LIMIT_COSTS['get_product'] * len(lookup_barcodes(barcodes))
+    retry_after = take_tokens(rate_limit_checks(), cost)
+    if retry_after is not None:
+        return too_many_requests('Rate limit exceeded for product lookups', retry_after)
+    return None
+
+@app.before_request
+def admit_request():
+    """Reject over-budget clients and excess concurrent work before any decoding or upstream calls"""
+    if not RATE_LIMIT_ENABLED or request.endpoint not in RATE_LIMIT_COSTS:
+        return None
+    
+    body = request.get_json(silent=True) if request.endpoint == 'scan_barcode_batch' else None
+    cost = request_cost(RATE_LIMIT_COSTS, request.endpoint, body)
+    retry_after = take_tokens(rate_limit_checks(), cost)
+    if retry_after is not None:
+        return too_many_requests('Rate limit exceeded', retry_after)
+    
+    if request.endpoint in EXPENSIVE_ENDPOINTS:
+        if not expensive_slots.acquire(blocking=False):
+            return too_many_requests('Server busy, try again shortly', 1)
+        g.holds_expensive_slot = True
+    return None
+
+@app.after_request
+def compress_response(response):
+    """Brotli/gzip-encode JSON responses according to the client's Accept-Encoding"""
+    if (response.direct_passthrough or response.mimetype != 'application/json'
+            or 'Content-Encoding' in response.headers or response.status_code < 200):
+        return response
+    
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_BYTES:
+        return response
+    
+    # Pick the highest-quality supported encoding; ties go to brotli, q=0 means refused
+    encodings = ['br', 'gzip'] if brotli else ['gzip']
+    encoding = max(encodings, key=lambda e: request.accept_encodings[e])
+    if request.accept_encodings[encoding] <= 0:
+        return response
+    
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=5))
+    else:
+        response.set_data(gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = encoding
+    
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.teardown_request
+def release_expensive_slot(exc):
+    if g.pop('holds_expensive_slot', False):
+        expensive_slots.release()
+
+# Only one cProfile can be active per process on Python 3.12+ (it uses sys.monitoring,
+# which covers every thread), and per OS thread before that, which all greenlets in a
+# gevent worker share; either way only one request per worker may profile at a time
+profiler_lock = threading.Lock()
+
+class RequestProfile:
+    """Call profile and wall-clock spans captured for one request"""
+    
+    def __init__(self):
+        self.id = uuid.uuid4().hex[:12]
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.spans = []
+        self.profiler = None
+        self.profiling = False
+        if profiler_lock.acquire(blocking=False):
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+            self.profiling = True
+    
+    def stop(self):
+        """Stop the call profiler and hand it to the next request; safe to call more than once"""
+        if self.profiling:
+            self.profiling = False
+            self.profiler.disable()
+            profiler_lock.release()
+    
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.spans.append({
+                'name': name,
+                'start_ms': round((start - self.start) * 1000, 2),
+                'duration_ms': round((end - start) * 1000, 2),
+                'thread': threading.current_thread().name
+            })
+    
+    def finish(self, status_code):
+        duration_ms = round((time.perf_counter() - self.start) * 1000, 2)
+        self.stop()
+        stats_text = 'Call profile skipped: another request in this worker was being profiled\n'
+        if self.profiler:
+            output = io.StringIO()
+            pstats.Stats(self.profiler, stream=output).sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+            stats_text = output.getvalue()
+        return {
+            'id': self.id,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': status_code,
+            'started_at': self.started_at,
+            'duration_ms': duration_ms,
+            'spans': self.spans,
+            'profile': stats_text
+        }
+
+current_profile = contextvars.ContextVar('current_profile', default=None)
+profile_buffer = deque(maxlen=PROFILE_BUFFER_SIZE)
+profile_buffer_lock = threading.Lock()
+NULL_SPAN = nullcontext()
+
+def profile_span(name):
+    """Time a block as a named span of the current request's profile; a no-op when not profiling"""
+    profile = current_profile.get()
+    if profile is None:
+        return NULL_SPAN
+    return profile.span(name)
+
+def in_context(func):
+    """Bind func to a copy of the caller's context so spans recorded on worker threads reach the request profile
+    
+    Each copy can only run once at a time, so wrap func separately for every task.
+    """
+    return partial(contextvars.copy_context().run, func)
+
+def is_admin():
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
+
+@app.before_request
+def start_profiling():
+    if not ADMIN_TOKEN or 'X-Profile' not in request.headers or not is_admin():
+        return None
+    g.profile_token = current_profile.set(RequestProfile())
+    return None
+
+def server_timing(spans):
+    """Summarize spans as a Server-Timing header so they show up in browser devtools"""
+    totals = OrderedDict()
+    for span in spans:
+        duration, count = totals.get(span['name'], (0, 0))
+        totals[span['name']] = (duration + span['duration_ms'], count + 1)
+    return ', '.join(
+        f'{re.sub(r"[^A-Za-z0-9_-]", "_", name)};dur={duration:.1f};desc="{name} x{count}"'
+        for name, (duration, count) in totals.items()
+    )
+
+@app.after_request
+def finish_profiling(response):
+    profile = current_profile.get()
+    if profile is None:
+        return response
+    
+    result = profile.finish(response.status_code)
+    with profile_buffer_lock:
+        profile_buffer.append(result)
+    
+    response.headers['X-Profile-Id'] = result['id']
+    timing = server_timing(result['spans'])
+    response.headers['Server-Timing'] = f"{timing}, total;dur={result['duration_ms']:.1f}" if timing else f"total;dur={result['duration_ms']:.1f}"
+    
+    # The buffer is per worker, so a later lookup by id can land on another worker;
+    # inline mode returns the profile with the response itself
+    if request.headers.get('X-Profile', '').lower() == 'inline' and response.is_json:
+        body = response.get_json(silent=True)
+        if isinstance(body, dict):
+            body['_profile'] = result
+            response.set_data(app.json.dumps(body))
+    return response
+
+@app.teardown_request
+def reset_profiling(exc):
+    token = g.pop('profile_token', None)
+    if token is not None:
+        profile = current_profile.get()
+        if profile:
+            # Requests that fail before after_request must still release the profiler
+            profile.stop()
+        current_profile.reset(token)
+
+@app.route('/api/admin/profiles', methods=['GET'])
+def list_profiles():
+    if not is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
+    with profile_buffer_lock:
+        profiles = [{key: value for key, value in p.items() if key != 'profile'} for p in reversed(profile_buffer)]
+    return jsonify(profiles)
+
+@app.route('/api/admin/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    if not is_admin():
+        return jsonify({'error': 'Forbidden'}), 403
+    with profile_buffer_lock:
+        profile = next((p for p in profile_buffer if p['id'] == profile_id), None)
+    if not profile:
+        return jsonify({'error': 'Profile not found'}), 404
+    return jsonify(profile)
+
 @app.route('/')
 def home():
     return send_from_directory('.', 'index.html')
@@ -51,36 +459,45 @@ def serve_static(path):
 def get_languages():
     return jsonify(LANGUAGES)
 
-@app.route('/api/scan-barcode', methods=['POST'])
-def scan_barcode():
-    try:
-        data = request.get_json()
-        image_data = data.get('image')
-        
-        if not image_data:
-            return jsonify({'error': 'No image provided'}), 400
-        
-        # Decode base64 image
-        image_bytes = base64.b64decode(image_data.split(',')[1] if ',' in image_data else image_data)
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to OpenCV format
-        cv_image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-        
-        # Try multiple image processing techniques for better barcode detection
-        barcodes = []
-        
-        # 1. Try with original image
+def run_off_event_loop(func, *args):
+    """Run CPU-bound work on a native thread when serving under gevent so it doesn't stall other requests"""
+    if gevent and gevent_monkey.is_module_patched('threading'):
+        return gevent.get_hub().threadpool.apply(in_context(func), args)
+    return func(*args)
+
+def decode_image(image_data):
+    """Decode a base64 (optionally data-URL prefixed) image into OpenCV BGR format"""
+    image_bytes = base64.b64decode(image_data.split(',')[1] if ',' in image_data else image_data)
+    image = Image.open(io.BytesIO(image_bytes)).convert('RGB')
+    return cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
+
+def find_barcodes(cv_image, all_passes=False):
+    """Run the decode chain on an image and return all symbols from the first pass that finds any
+    
+    With all_passes, every pass runs and their symbols are combined, so codes that only
+    become readable after contrast enhancement or thresholding aren't dropped when
+    another code in the photo decoded earlier. serialize_barcodes removes the duplicates.
+    """
+    # Try multiple image processing techniques for better barcode detection
+    found = []
+    
+    # 1. Try with original image
+    with profile_span('pyzbar_original'):
         barcodes = pyzbar.decode(cv_image)
-        
-        # 2. If no barcode found, try with grayscale
-        if not barcodes:
+    found.extend(barcodes)
+    
+    # 2. If no barcode found (or running every pass), try with grayscale
+    if all_passes or not found:
+        with profile_span('cv_grayscale'):
             gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+        with profile_span('pyzbar_grayscale'):
             barcodes = pyzbar.decode(gray)
-        
-        # 3. Try with enhanced contrast
-        if not barcodes:
-            # Increase contrast
+        found.extend(barcodes)
+    
+    # 3. Try with enhanced contrast
+    if all_passes or not found:
+        # Increase contrast
+        with profile_span('cv_clahe'):
             lab = cv2.cvtColor(cv_image, cv2.COLOR_BGR2LAB)
             l, a, b = cv2.split(lab)
             clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
@@ -88,51 +505,220 @@ def scan_barcode():
             enhanced = cv2.merge([l, a, b])
             enhanced = cv2.cvtColor(enhanced, cv2.COLOR_LAB2BGR)
             enhanced_gray = cv2.cvtColor(enhanced, cv2.COLOR_BGR2GRAY)
+        with profile_span('pyzbar_clahe'):
             barcodes = pyzbar.decode(enhanced_gray)
-        
-        # 4. Try with binary threshold
-        if not barcodes:
+        found.extend(barcodes)
+    
+    # 4. Try with binary threshold
+    if all_passes or not found:
+        with profile_span('cv_threshold'):
             _, binary = cv2.threshold(gray, 127, 255, cv2.THRESH_BINARY)
+        with profile_span('pyzbar_threshold'):
             barcodes = pyzbar.decode(binary)
-        
-        # 5. Try with adaptive threshold
-        if not barcodes:
+        found.extend(barcodes)
+    
+    # 5. Try with adaptive threshold
+    if all_passes or not found:
+        with profile_span('cv_adaptive_threshold'):
             adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
+        with profile_span('pyzbar_adaptive_threshold'):
             barcodes = pyzbar.decode(adaptive)
+        found.extend(barcodes)
+    
+    return found
+
+def serialize_barcodes(barcodes):
+    """Convert pyzbar results to JSON-friendly dicts, dropping duplicate (data, type) decodes"""
+    results = []
+    seen = set()
+    for barcode in barcodes:
+        # Clean up the barcode data (remove any extra whitespace)
+        data = barcode.data.decode('utf-8').strip()
+        if not data or (data, barcode.type) in seen:
+            continue
+        seen.add((data, barcode.type))
+        results.append({
+            'barcode': data,
+            'type': barcode.type,
+            'rect': {
+                'left': barcode.rect.left,
+                'top': barcode.rect.top,
+                'width': barcode.rect.width,
+                'height': barcode.rect.height
+            },
+            'polygon': [{'x': point.x, 'y': point.y} for point in barcode.polygon],
+            'quality': barcode.quality,
+            'orientation': barcode.orientation
+        })
+    return results
+
+scan_session_frames = ScanSessionFrames(MAX_SCAN_SESSIONS, FRAME_DIFF_THRESHOLD, FRAME_SHARPNESS_CHANGE, FRAME_MAX_SKIP_SECONDS)
+
+def scan_image(image_data, session=None, all_passes=False):
+    """Decode one base64 image and return every barcode found in it
+    
+    With a scan session id, returns None without decoding when the frame is a
+    near-duplicate of that session's last failed frame.
+    """
+    with profile_span('decode_image'):
+        cv_image = run_off_event_loop(decode_image, image_data)
+    
+    if session:
+        with profile_span('frame_signature'):
+            signature = FrameSignature(cv_image)
+        if scan_session_frames.is_unchanged(session, signature):
+            return None
+    
+    barcodes = serialize_barcodes(run_off_event_loop(find_barcodes, cv_image, all_passes))
+    
+    if session:
+        scan_session_frames.record(session, signature, bool(barcodes))
+    return barcodes
+
+def resolve_product(barcode, target_lang, fields=None, include_labels=True):
+    """Look up a product, add it to the search index and translate it if needed"""
+    product_info = get_product_from_multiple_sources(barcode, USDA_API_KEY)
+    if not product_info:
+        return None
+    
+    search_index.add(product_info)
+    
+    if target_lang != 'en' and target_lang in LANGUAGES:
+        product_info = translate_product_info(product_info, target_lang, fields, include_labels)
+        if fields is None or 'name' in fields:
+            search_index.add(product_info, target_lang)
+    
+    product_info['thumbnail_url'] = image_proxy_url(product_info.get('image_url', ''))
+    return product_info
+
+def lookup_barcodes(barcodes):
+    """The unique barcodes a "lookup" request resolves, capped at MAX_LOOKUP_BARCODES"""
+    return list(dict.fromkeys(barcodes))[:MAX_LOOKUP_BARCODES]
+
+def lookup_products(barcodes, target_lang):
+    """Fetch (and translate) product info for each unique barcode in parallel"""
+    unique = lookup_barcodes(barcodes)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(len(unique), SCAN_WORKERS))) as executor:
+        futures = [executor.submit(in_context(resolve_product), barcode, target_lang) for barcode in unique]
+        return dict(zip(unique, (future.result() for future in futures)))
+
+@app.route('/api/scan-barcode', methods=['POST'])
+def scan_barcode():
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        image_data = data.get('image')
+        
+        if not image_data:
+            return jsonify({'error': 'No image provided'}), 400
+        
+        # Continuous scanners send a session id so unchanged frames can be skipped
+        session = data.get('session')
+        barcodes = scan_image(image_data, f"{request.remote_addr}:{session}" if session else None, bool(data.get('all_passes')))
+        
+        if barcodes is None:
+            return jsonify({'error': 'No barcode found in image', 'skipped': True}), 404
         
         if not barcodes:
             return jsonify({'error': 'No barcode found in image'}), 404
         
-        # Get the first barcode
-        barcode_data = barcodes[0].data.decode('utf-8')
+        # Keep the first barcode at the top level for existing clients
+        result = {
+            'barcode': barcodes[0]['barcode'],
+            'type': barcodes[0]['type'],
+            'barcodes': barcodes
+        }
         
-        # Clean up the barcode data (remove any extra whitespace)
-        barcode_data = barcode_data.strip()
+        if data.get('lookup'):
+            codes = [b['barcode'] for b in barcodes]
+            over_limit = charge_lookups(codes)
+            if over_limit:
+                return over_limit
+            result['products'] = lookup_products(codes, data.get('lang', 'en'))
         
-        return jsonify({
-            'barcode': barcode_data,
-            'type': barcodes[0].type
-        })
+        return jsonify(result)
         
     except Exception as e:
         print(f"Barcode scanning error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/scan-barcode/batch', methods=['POST'])
+def scan_barcode_batch():
+    try:
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
+        images = data.get('images')
+        
+        if not images or not isinstance(images, list):
+            return jsonify({'error': 'No images provided'}), 400
+        
+        if len(images) > MAX_BATCH_IMAGES:
+            return jsonify({'error': f'Too many images (max {MAX_BATCH_IMAGES})'}), 400
+        
+        # Batches are shelf and receiving-dock photos with many codes, so by default
+        # every decode pass runs rather than stopping at the first that finds something
+        all_passes = bool(data.get('all_passes', True))
+        
+        def scan(image_data):
+            try:
+                return {'barcodes': scan_image(image_data, all_passes=all_passes)}
+            except Exception as e:
+                print(f"Batch barcode scanning error: {e}")
+                return {'barcodes': [], 'error': str(e)}
+        
+        # OpenCV and zbar release the GIL, so threads decode images in parallel
+        with ThreadPoolExecutor(max_workers=min(len(images), SCAN_WORKERS)) as executor:
+            results = [future.result() for future in [executor.submit(in_context(scan), image) for image in images]]
+        
+        unique_barcodes = list(dict.fromkeys(b['barcode'] for r in results for b in r['barcodes']))
+        response = {
+            'results': results,
+            'barcodes': unique_barcodes
+        }
+        
+        if data.get('lookup') and unique_barcodes:
+            over_limit = charge_lookups(unique_barcodes)
+            if over_limit:
+                return over_limit
+            response['products'] = lookup_products(unique_barcodes, data.get('lang', 'en'))
+        
+        return jsonify(response)
+        
+    except Exception as e:
+        print(f"Batch barcode scanning error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def parse_fields(fields_param):
+    """Parse a comma-separated fields parameter; None means every field"""
+    if not fields_param:
+        return None
+    fields = {field.strip() for field in fields_param.split(',') if field.strip()}
+    # Always identify the product, and keep translation status alongside translated fields
+    return fields | {'barcode', 'translated_to', 'translation_error'}
+
 @app.route('/api/product/<barcode>', methods=['GET'])
 def get_product(barcode):
     try:
         # Get target language from query params
         target_lang = request.args.get('lang', 'en')
         
-        # Try multiple sources to get complete product information
-        product_info = get_product_from_multiple_sources(barcode, USDA_API_KEY)
+        # Optional projection (?fields=name,image_url) and compact mode, which leaves
+        # out nutrition_labels for clients that fetch /api/nutrition-labels once
+        fields = parse_fields(request.args.get('fields'))
+        compact = request.args.get('compact', '').lower() in ('1', 'true')
+        include_labels = not compact and (fields is None or 'nutrition_labels' in fields)
+        
+        # Try multiple sources to get complete product information, translating if needed
+        product_info = resolve_product(barcode, target_lang, fields, include_labels)
         
         if not product_info:
             return jsonify({'error': 'Product not found'}), 404
         
-        # Translate if needed
-        if target_lang != 'en' and target_lang in LANGUAGES:
-            product_info = translate_product_info(product_info, target_lang)
+        if fields is not None:
+            product_info = {key: value for key, value in product_info.items() if key in fields}
         
         return jsonify(product_info)
         
@@ -140,6 +726,169 @@ def get_product(barcode):
         print(f"Error getting product: {e}")
         return jsonify({'error': str(e)}), 500
 
+def is_proxyable_image(image_url):
+    """Only proxy images hosted by known product databases"""
+    try:
+        parsed = urlparse(image_url)
+    except ValueError:
+        return False
+    host = (parsed.hostname or '').lower()
+    return parsed.scheme in ('http', 'https') and host in IMAGE_PROXY_HOSTS
+
+def image_proxy_url(image_url, width=IMAGE_THUMBNAIL_WIDTH):
+    """Build the /api/image URL for a product image, or return it unchanged if it can't be proxied"""
+    if not image_url or not is_proxyable_image(image_url):
+        return image_url
+    return f"/api/image?url={quote(image_url, safe='')}&w={width}"
+
+def image_cache_path(image_url, width, fmt):
+    digest = hashlib.sha256(image_url.encode('utf-8')).hexdigest()
+    return os.path.join(IMAGE_CACHE_DIR, f"{digest}_{width}.{fmt}")
+
+def load_image_cache_index():
+    """Index the files already on disk, least recently used first (once per worker)"""
+    global image_cache_entries, image_cache_bytes
+    image_cache_entries = OrderedDict()
+    image_cache_bytes = 0
+    if not os.path.isdir(IMAGE_CACHE_DIR):
+        return
+    entries = []
+    for entry in os.scandir(IMAGE_CACHE_DIR):
+        if entry.is_file() and not entry.name.endswith('.tmp'):
+            stat = entry.stat()
+            entries.append((stat.st_mtime, entry.path, stat.st_size))
+    for _, path, size in sorted(entries):
+        image_cache_entries[path] = size
+        image_cache_bytes += size
+
+def track_image_variant(path, size=None):
+    """Mark a variant as recently used (recording its size if new) and evict down to IMAGE_CACHE_MAX_BYTES"""
+    global image_cache_bytes
+    with image_cache_lock:
+        if image_cache_entries is None:
+            load_image_cache_index()
+        if size is not None:
+            image_cache_bytes += size - image_cache_entries.get(path, 0)
+            image_cache_entries[path] = size
+        if path in image_cache_entries:
+            image_cache_entries.move_to_end(path)
+        
+        while image_cache_bytes > IMAGE_CACHE_MAX_BYTES and image_cache_entries:
+            oldest, oldest_size = image_cache_entries.popitem(last=False)
+            image_cache_bytes -= oldest_size
+            try:
+                os.remove(oldest)
+            except OSError:
+                pass
+
+def fetch_upstream_image(image_url):
+    """Download an image of at most IMAGE_MAX_BYTES, or return None
+    
+    Redirects aren't followed, since they could lead off the allowed hosts.
+    """
+    with requests.get(image_url, timeout=5, stream=True, allow_redirects=False) as response:
+        if response.status_code != 200:
+            return None
+        content_type = response.headers.get('Content-Type', '')
+        if not content_type.startswith('image/'):
+            print(f"Image proxy: unexpected content type {content_type!r} for {image_url}")
+            return None
+        if int(response.headers.get('Content-Length') or 0) > IMAGE_MAX_BYTES:
+            print(f"Image proxy: {image_url} is larger than {IMAGE_MAX_BYTES} bytes")
+            return None
+        
+        # Content-Length may be missing or wrong, so count what actually arrives
+        chunks = []
+        received = 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            received += len(chunk)
+            if received > IMAGE_MAX_BYTES:
+                print(f"Image proxy: {image_url} is larger than {IMAGE_MAX_BYTES} bytes")
+                return None
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+def build_image_variants(image_url):
+    """Fetch the upstream image once and store every width in both WebP and JPEG
+    
+    Returns {(width, fmt): encoded bytes}, or None if the upstream image is unavailable.
+    """
+    image_bytes = fetch_upstream_image(image_url)
+    if image_bytes is None:
+        return None
+    
+    variants = run_off_event_loop(save_image_variants, image_url, image_bytes)
+    
+    for (width, fmt), data in variants.items():
+        track_image_variant(image_cache_path(image_url, width, fmt), len(data))
+    return variants
+
+def save_image_variants(image_url, image_bytes):
+    """Resize and encode every cached variant of an image (CPU-bound)"""
+    image = Image.open(io.BytesIO(image_bytes))
+    # Image.open only reads the header, so reject decompression bombs before decoding
+    if image.width * image.height > IMAGE_MAX_PIXELS:
+        raise ValueError(f"Image too large: {image.width}x{image.height}")
+    image = image.convert('RGB')
+    os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+    
+    variants = {}
+    for width in IMAGE_WIDTHS:
+        variant = image
+        if image.width > width:
+            variant = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        for fmt, options in (('webp', {'quality': 80}), ('jpeg', {'quality': 80, 'optimize': True})):
+            output = io.BytesIO()
+            variant.save(output, fmt.upper(), **options)
+            data = output.getvalue()
+            # Write to a temp file first so concurrent readers never see a partial image
+            path = image_cache_path(image_url, width, fmt)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            variants[(width, fmt)] = data
+    return variants
+
+def read_image_variant(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+@app.route('/api/image', methods=['GET'])
+def get_image():
+    try:
+        image_url = request.args.get('url', '')
+        if not is_proxyable_image(image_url):
+            return jsonify({'error': 'Image host not allowed'}), 400
+        
+        # Serve the smallest configured width that covers the request
+        requested = request.args.get('w', IMAGE_THUMBNAIL_WIDTH, type=int)
+        width = next((w for w in IMAGE_WIDTHS if w >= requested), IMAGE_WIDTHS[-1])
+        fmt = 'webp' if 'image/webp' in request.headers.get('Accept', '') else 'jpeg'
+        
+        # Read the bytes before anything else can evict the file; rebuild if it's gone
+        path = image_cache_path(image_url, width, fmt)
+        data = read_image_variant(path)
+        if data is not None:
+            track_image_variant(path)
+        else:
+            variants = build_image_variants(image_url)
+            if not variants:
+                return jsonify({'error': 'Image not found'}), 404
+            data = variants[(width, fmt)]
+        
+        response = app.response_class(data, mimetype=f"image/{fmt}")
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        response.headers['Vary'] = 'Accept'
+        return response
+        
+    except Exception as e:
+        print(f"Image proxy error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 def get_product_from_multiple_sources(barcode, usda_api_key):
     """Try multiple sources to get complete product information"""
     print(f"\nSearching for product: {barcode}")
@@ -149,7 +898,8 @@ def get_product_from_multiple_sources(barcode, usda_api_key):
     
     # 1. Try OpenFoodFacts first (most comprehensive)
     print("Trying OpenFoodFacts...")
-    off_data = get_from_openfoodfacts(barcode)
+    with profile_span('openfoodfacts'):
+        off_data = get_from_openfoodfacts(barcode)
     if off_data:
         product_info = off_data
         print(f"Found in OpenFoodFacts: {product_info.get('name', 'Unknown')}")
@@ -157,7 +907,8 @@ def get_product_from_multiple_sources(barcode, usda_api_key):
     # 2. Try Barcode Lookup API (free tier available)
     if not product_info or not product_info.get('ingredients') or product_info.get('ingredients') == 'Ingredients not available in database':
         print("Trying Barcode Lookup...")
-        barcode_lookup_data = get_from_barcode_lookup(barcode)
+        with profile_span('upcitemdb'):
+            barcode_lookup_data = get_from_barcode_lookup(barcode)
         if barcode_lookup_data:
             if product_info:
                 product_info = merge_product_info(product_info, barcode_lookup_data)
@@ -167,7 +918,8 @@ def get_product_from_multiple_sources(barcode, usda_api_key):
     # 3. Try USDA FoodData Central (US products)
     if not product_info or not product_info.get('ingredients') or product_info.get('ingredients') == 'Ingredients not available in database':
         print("Trying USDA FoodData Central...")
-        usda_data = get_from_usda(barcode, usda_api_key)
+        with profile_span('usda'):
+            usda_data = get_from_usda(barcode, usda_api_key)
         if usda_data:
             if product_info:
                 product_info = merge_product_info(product_info, usda_data)
@@ -260,13 +1012,18 @@ def get_from_openfoodfacts(barcode):
         
         product = data['product']
         
-        # Extract all possible ingredient fields
-        ingredients = (product.get('ingredients_text') or 
-                      product.get('ingredients_text_en') or 
-                      product.get('ingredients_text_with_allergens') or 
-                      product.get('ingredients_text_fr') or  # Try French
-                      product.get('ingredients_text_es') or  # Try Spanish
-                      '')
+        # Extract all possible ingredient fields, remembering which language each is in
+        ingredient_fields = (
+            ('ingredients_text', product.get('lang')),
+            ('ingredients_text_en', 'en'),
+            ('ingredients_text_with_allergens', product.get('lang')),
+            ('ingredients_text_fr', 'fr'),  # Try French
+            ('ingredients_text_es', 'es')   # Try Spanish
+        )
+        ingredients, ingredients_lang = next(
+            ((product[field], lang) for field, lang in ingredient_fields if product.get(field)),
+            ('', None)
+        )
         
         # Extract allergens from multiple sources
         allergens = product.get('allergens') or product.get('allergens_en') or ''
@@ -294,6 +1051,7 @@ def get_from_openfoodfacts(barcode):
             'name': product.get('product_name') or product.get('product_name_en') or 'Unknown Product',
             'brand': product.get('brands') or 'Unknown Brand',
             'ingredients': ingredients or 'Ingredients not available in database',
+            'ingredients_lang': ingredients_lang or '',
             'allergens': allergens or 'No allergen information available',
             'categories': categories,
             'nutrition': extract_openfoodfacts_nutrition(product.get('nutriments', {})),
@@ -452,6 +1210,7 @@ def get_from_usda(barcode, api_key):
             'name': product.get('description', 'Unknown Product'),
             'brand': product.get('brandOwner', 'Unknown Brand'),
             'ingredients': ingredients or 'Ingredients not available in database',
+            'ingredients_lang': 'en' if ingredients else '',
             'allergens': '',  # USDA doesn't provide allergen info directly
             'categories': product.get('brandedFoodCategory', ''),
             'nutrition': nutrients,
@@ -511,7 +1270,9 @@ def merge_product_info(primary, secondary):
 @app.route('/api/translate', methods=['POST'])
 def translate_text():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'error': 'Expected a JSON object'}), 400
         text = data.get('text')
         target_lang = data.get('target_lang', 'en')
         source_lang = data.get('source_lang', 'auto')
@@ -520,9 +1281,9 @@ def translate_text():
             return jsonify({'error': 'No text provided'}), 400
         
         if source_lang == 'auto':
-            translator = GoogleTranslator(source='auto', target=target_lang)
+            translator = get_translator('auto', target_lang)
         else:
-            translator = GoogleTranslator(source=source_lang, target=target_lang)
+            translator = get_translator(source_lang, target_lang)
         
         translated_text = translator.translate(text)
         
@@ -536,76 +1297,91 @@ def translate_text():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def translate_product_info(product_info, target_lang):
-    """Translate product information to target language"""
+def get_translator(source, target):
+    """Create a translator whose calls are recorded as spans while the request is profiled"""
+    translator = GoogleTranslator(source=source, target=target)
+    if current_profile.get() is not None:
+        translate = translator.translate
+        
+        def traced_translate(text, **kwargs):
+            with profile_span(f"translate_{target}"):
+                return translate(text, **kwargs)
+        
+        translator.translate = traced_translate
+    return translator
+
+translation_memory = TranslationMemory(TRANSLATION_MEMORY_PATH)
+GOOGLE_SOURCE_LANGS = {code.lower() for code in GOOGLE_LANGUAGES_TO_CODES.values()}
+
+@lru_cache(maxsize=len(LANGUAGES))
+def get_nutrition_labels(target_lang):
+    """Translate the nutrition labels once per language and reuse them for every product"""
+    if target_lang == 'en':
+        return dict(NUTRITION_LABELS)
+    translator = get_translator('en', target_lang)
+    return {key: translator.translate(label) for key, label in NUTRITION_LABELS.items()}
+
+@app.route('/api/nutrition-labels', methods=['GET'])
+def nutrition_labels():
+    try:
+        target_lang = request.args.get('lang', 'en')
+        if target_lang not in LANGUAGES:
+            return jsonify({'error': 'Unsupported language'}), 400
+        
+        response = jsonify(get_nutrition_labels(target_lang))
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        return response
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+def translate_product_info(product_info, target_lang, fields=None, include_labels=True):
+    """Translate product information to target language
+    
+    Only fields in `fields` are translated when it is given; nutrition labels are
+    skipped when include_labels is False.
+    """
+    def wanted(field):
+        return fields is None or field in fields
+    
     try:
-        translator = GoogleTranslator(source='auto', target=target_lang)
+        translator = get_translator('auto', target_lang)
         
         # Translate name
-        if product_info['name'] != 'Unknown':
+        if wanted('name') and product_info['name'] != 'Unknown':
             product_info['name'] = translator.translate(product_info['name'])
         
         # Translate brand
-        if product_info['brand'] != 'Unknown':
+        if wanted('brand') and product_info['brand'] != 'Unknown':
             product_info['brand'] = translator.translate(product_info['brand'])
         
         # Translate ingredients
-        if product_info['ingredients'] and product_info['ingredients'] != 'Ingredients not available in database':
-            product_info['ingredients'] = translator.translate(product_info['ingredients'])
+        if not wanted('ingredients'):
+            pass
+        elif product_info['ingredients'] and product_info['ingredients'] != 'Ingredients not available in database':
+            # Translate from the ingredient text's known language when the source told us
+            source_lang = (product_info.get('ingredients_lang') or 'auto').lower()
+            if source_lang not in GOOGLE_SOURCE_LANGS:
+                source_lang = 'auto'
+            if source_lang != target_lang:
+                ingredient_translator = translator if source_lang == 'auto' else get_translator(source_lang, target_lang)
+                product_info['ingredients'] = translate_ingredients(
+                    product_info['ingredients'], source_lang, target_lang, ingredient_translator, translation_memory
+                )
         elif product_info['ingredients'] == 'Ingredients not available in database':
             product_info['ingredients'] = translator.translate('Ingredients not available in database')
         
         # Translate allergens
-        if product_info['allergens'] and product_info['allergens'] != 'No allergen information available':
+        if not wanted('allergens'):
+            pass
+        elif product_info['allergens'] and product_info['allergens'] != 'No allergen information available':
             product_info['allergens'] = translator.translate(product_info['allergens'])
         elif product_info['allergens'] == 'No allergen information available':
             product_info['allergens'] = translator.translate('No allergen information available')
         
         # Add comprehensive nutrition labels in target language
-        nutrition_labels = {
-            'energy': translator.translate('Calories'),
-            'energy_kj': translator.translate('Energy (kJ)'),
-            'fat': translator.translate('Total Fat'),
-            'saturated_fat': translator.translate('Saturated Fat'),
-            'monounsaturated_fat': translator.translate('Monounsaturated Fat'),
-            'polyunsaturated_fat': translator.translate('Polyunsaturated Fat'),
-            'trans_fat': translator.translate('Trans Fat'),
-            'cholesterol': translator.translate('Cholesterol'),
-            'carbohydrates': translator.translate('Total Carbohydrates'),
-            'sugars': translator.translate('Sugars'),
-            'added_sugars': translator.translate('Added Sugars'),
-            'fiber': translator.translate('Dietary Fiber'),
-            'proteins': translator.translate('Protein'),
-            'salt': translator.translate('Salt'),
-            'sodium': translator.translate('Sodium'),
-            'potassium': translator.translate('Potassium'),
-            'calcium': translator.translate('Calcium'),
-            'iron': translator.translate('Iron'),
-            'magnesium': translator.translate('Magnesium'),
-            'phosphorus': translator.translate('Phosphorus'),
-            'zinc': translator.translate('Zinc'),
-            'copper': translator.translate('Copper'),
-            'manganese': translator.translate('Manganese'),
-            'selenium': translator.translate('Selenium'),
-            'iodine': translator.translate('Iodine'),
-            'vitamin_a': translator.translate('Vitamin A'),
-            'vitamin_c': translator.translate('Vitamin C'),
-            'vitamin_d': translator.translate('Vitamin D'),
-            'vitamin_e': translator.translate('Vitamin E'),
-            'vitamin_k': translator.translate('Vitamin K'),
-            'vitamin_b1': translator.translate('Thiamin (B1)'),
-            'vitamin_b2': translator.translate('Riboflavin (B2)'),
-            'niacin': translator.translate('Niacin (B3)'),
-            'vitamin_b6': translator.translate('Vitamin B6'),
-            'folate': translator.translate('Folate'),
-            'vitamin_b12': translator.translate('Vitamin B12'),
-            'pantothenic_acid': translator.translate('Pantothenic Acid'),
-            'biotin': translator.translate('Biotin'),
-            'caffeine': translator.translate('Caffeine'),
-            'alcohol': translator.translate('Alcohol')
-        }
-        
-        product_info['nutrition_labels'] = nutrition_labels
+        if include_labels:
+            product_info['nutrition_labels'] = get_nutrition_labels(target_lang)
         product_info['translated_to'] = target_lang
         
     except Exception as e:
@@ -614,6 +1390,43 @@ def translate_product_info(product_info, target_lang):
     
     return product_info
 
+search_index = ProductSearchIndex(SEARCH_CATALOG_PATH)
+
+if SEARCH_CATALOG_PATH and os.path.exists(SEARCH_CATALOG_PATH):
+    try:
+        print(f"Loaded {search_index.refresh_catalog()} catalog records into search index")
+    except (OSError, ValueError) as e:
+        print(f"Error loading search catalog: {e}")
+
+@app.route('/api/search', methods=['GET'])
+def search_products():
+    try:
+        query = request.args.get('q', '').strip()
+        target_lang = request.args.get('lang', 'en')
+        limit = max(1, min(request.args.get('limit', 20, type=int), SEARCH_MAX_RESULTS))
+        
+        if not query:
+            return jsonify({'error': 'No query provided'}), 400
+        
+        # Pick up products other workers resolved since the last search
+        try:
+            search_index.refresh_catalog()
+        except (OSError, ValueError) as e:
+            print(f"Error refreshing search catalog: {e}")
+        
+        results = search_index.search(query, target_lang, limit)
+        for result in results:
+            result['thumbnail_url'] = image_proxy_url(result['image_url'])
+        return jsonify({
+            'query': query,
+            'count': len(results),
+            'results': results
+        })
+        
+    except Exception as e:
+        print(f"Search error: {e}")
+        return jsonify({'error': str(e)}), 500
+
 if __name__ == '__main__':
     print("\n🍔 Starting Fooderator...")
     print("\n✅ Frontend and Backend running together!")
@@ -622,8 +1435,13 @@ if __name__ == '__main__':
     print("   - Network: http://YOUR_IP:5000")
     print("\n🌐 API Endpoints:")
     print("   - POST /api/scan-barcode")
+    print("   - POST /api/scan-barcode/batch")
     print("   - GET /api/product/<barcode>?lang=<code>")
     print("   - POST /api/translate")
+    print("   - GET /api/image?url=<image_url>&w=<width>")
     print("   - GET /api/languages")
+    print("   - GET /api/nutrition-labels?lang=<code>")
+    print("   - GET /api/search?q=<query>&lang=<code>")
+    print("   - GET /api/admin/profiles (requires ADMIN_TOKEN)")
     print("\n")
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,3 @@
+# test_api.py, test_bourbon.py and test_fooderator.py are manual scripts that call a
+# running server (or the USDA API) at import time, so pytest only collects the unit tests
+collect_ignore = ['test_api.py', 'test_bourbon.py', 'test_fooderator.py']
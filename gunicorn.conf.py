@@ -0,0 +1,10 @@
+import os
+
+# Serve with gevent workers by default: upstream lookups and translation calls are
+# I/O-bound, so each worker handles many requests concurrently instead of one.
+# Set GUNICORN_WORKER_CLASS=sync to go back to one request per worker.
+bind = f"0.0.0.0:{os.getenv('PORT', '10000')}"
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gevent')
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '500'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
@@ -0,0 +1,132 @@
+import re
+import sqlite3
+import threading
+
+# Characters per upstream translation request (Google's limit is 5000)
+TRANSLATE_BATCH_CHARS = 4500
+
+# Ingredient lists are split on these; everything between them is one ingredient.
+# Commas between digits are decimal commas ("cocoa 7,4%"), not separators.
+INGREDIENT_DELIMITERS = re.compile(r'([;:()\[\]]|(?<!\d),|,(?!\d))')
+INGREDIENT_TERM = re.compile(r'^([\s*]*)(.*?)((?:\s*\d+(?:[.,]\d+)?\s*%)?[\s.*]*)$', re.DOTALL)
+E_NUMBER = re.compile(r'^e\s?\d{3,4}[a-z]?$', re.IGNORECASE)
+
+class TranslationMemory:
+    """Persistent (source language, target language, normalized text) -> translation store backed by SQLite
+
+    The source language is 'auto' when the text's language isn't known.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.cache = {}  # (source_lang, target_lang, source) -> translation
+        self.lock = threading.Lock()
+        self.db = None
+
+    def _connect(self):
+        if self.db is None:
+            self.db = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+            self.db.execute(
+                'CREATE TABLE IF NOT EXISTS ingredient_translations ('
+                'source_lang TEXT NOT NULL, target_lang TEXT NOT NULL, source TEXT NOT NULL, translated TEXT NOT NULL, '
+                'PRIMARY KEY (source_lang, target_lang, source))'
+            )
+        return self.db
+
+    def lookup(self, source_lang, target_lang, sources):
+        """Return {source: translation} for every source already in memory"""
+        with self.lock:
+            found = {source: self.cache[(source_lang, target_lang, source)]
+                     for source in sources if (source_lang, target_lang, source) in self.cache}
+            missing = [source for source in sources if source not in found]
+            if not missing:
+                return found
+            # Other workers may have stored these since we last looked
+            try:
+                db = self._connect()
+                for i in range(0, len(missing), 500):
+                    chunk = missing[i:i + 500]
+                    rows = db.execute(
+                        'SELECT source, translated FROM ingredient_translations '
+                        f"WHERE source_lang = ? AND target_lang = ? AND source IN ({','.join('?' * len(chunk))})",
+                        [source_lang, target_lang, *chunk]
+                    )
+                    for source, translated in rows:
+                        self.cache[(source_lang, target_lang, source)] = translated
+                        found[source] = translated
+            except sqlite3.Error as e:
+                print(f"Translation memory error: {e}")
+        return found
+
+    def store(self, source_lang, target_lang, translations):
+        with self.lock:
+            for source, translated in translations.items():
+                self.cache[(source_lang, target_lang, source)] = translated
+            try:
+                db = self._connect()
+                db.executemany(
+                    'INSERT OR REPLACE INTO ingredient_translations (source_lang, target_lang, source, translated) VALUES (?, ?, ?, ?)',
+                    [(source_lang, target_lang, source, translated) for source, translated in translations.items()]
+                )
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"Translation memory error: {e}")
+
+def normalize_ingredient(text):
+    return ' '.join(text.lower().split())
+
+def translate_new_items(items, translator):
+    """Translate uncached items, several per upstream request joined by newlines"""
+    translations = {}
+    batch = []
+
+    def flush():
+        if not batch:
+            return
+        translated = (translator.translate('\n'.join(batch)) or '').split('\n')
+        if len(translated) == len(batch):
+            translations.update(zip(batch, (t.strip() for t in translated)))
+        else:
+            # The translator merged or split lines; fall back to one item per request
+            for item in batch:
+                translations[item] = translator.translate(item)
+        batch.clear()
+
+    for item in items:
+        if batch and sum(len(b) + 1 for b in batch) + len(item) > TRANSLATE_BATCH_CHARS:
+            flush()
+        batch.append(item)
+    flush()
+    return translations
+
+def translate_ingredients(ingredients, source_lang, target_lang, translator, memory):
+    """Translate an ingredient list item by item through the shared translation memory
+
+    Delimiters, percentages and E-numbers are kept as-is, so only ingredients never
+    seen before for this language pair are sent upstream. source_lang is the
+    language the translator translates from ('auto' if unknown).
+    """
+    segments = INGREDIENT_DELIMITERS.split(ingredients)
+    terms = {}  # segment index -> (prefix, core, suffix, key)
+    for i, segment in enumerate(segments):
+        if i % 2:
+            continue  # delimiter
+        prefix, core, suffix = INGREDIENT_TERM.match(segment).groups()
+        if not re.search(r'[^\W\d_]', core) or E_NUMBER.match(core):
+            continue
+        terms[i] = (prefix, core, suffix, normalize_ingredient(core))
+
+    keys = list(dict.fromkeys(term[3] for term in terms.values()))
+    known = memory.lookup(source_lang, target_lang, keys)
+    new_items = [key for key in keys if key not in known]
+    if new_items:
+        translated = translate_new_items(new_items, translator)
+        memory.store(source_lang, target_lang, translated)
+        known.update(translated)
+
+    for i, (prefix, core, suffix, key) in terms.items():
+        translated = known.get(key) or core
+        if core[:1].isupper():
+            translated = translated[:1].upper() + translated[1:]
+        segments[i] = f"{prefix}{translated}{suffix}"
+    return ''.join(segments)
@@ -0,0 +1,103 @@
+import math
+import time
+import threading
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+class MemoryTokenBuckets:
+    """Token buckets kept in this process's memory"""
+
+    MAX_CLIENTS = 10000
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.buckets = {}  # client -> (tokens, timestamp)
+        self.lock = threading.Lock()
+
+    def take(self, client, cost):
+        """Spend cost tokens; return (allowed, seconds until enough tokens are available)"""
+        now = self.clock()
+        with self.lock:
+            tokens, last = self.buckets.get(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            if client not in self.buckets and len(self.buckets) >= self.MAX_CLIENTS:
+                self._prune(now)
+            self.buckets[client] = (tokens, now)
+        return allowed, 0 if allowed else (cost - tokens) / self.rate
+
+    def _prune(self, now):
+        # Buckets that have refilled completely carry no state worth keeping
+        full = [c for c, (tokens, last) in self.buckets.items() if tokens + (now - last) * self.rate >= self.burst]
+        for client in full:
+            del self.buckets[client]
+
+class RedisTokenBuckets:
+    """Token buckets stored in Redis so every worker shares the same limits"""
+
+    SCRIPT = """
+    local tokens_ts = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local rate, burst, now, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+    local tokens = tonumber(tokens_ts[1]) or burst
+    local ts = tonumber(tokens_ts[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+    return {allowed, tostring(tokens)}
+    """
+
+    def __init__(self, client, prefix, rate, burst):
+        self.client = client
+        self.prefix = prefix
+        self.rate = rate
+        self.burst = burst
+        self.script = self.client.register_script(self.SCRIPT)
+
+    def take(self, client, cost):
+        """Spend cost tokens; return (allowed, seconds until enough tokens are available)"""
+        try:
+            allowed, tokens = self.script(keys=[f"{self.prefix}{client}"], args=[self.rate, self.burst, time.time(), cost])
+        except redis.RedisError as e:
+            # Fail open: a Redis outage shouldn't take the API down with it
+            print(f"Rate limiter error: {e}")
+            return True, 0
+        return bool(allowed), 0 if allowed else (cost - float(tokens)) / self.rate
+
+def request_cost(costs, endpoint, body):
+    """Tokens a request to endpoint costs; batch scans pay per image
+
+    body is the parsed JSON body, which may be anything a client sent.
+    """
+    cost = costs[endpoint]
+    if endpoint == 'scan_barcode_batch':
+        images = body.get('images') if isinstance(body, dict) else None
+        cost *= max(1, len(images) if isinstance(images, list) else 1)
+    return cost
+
+def take_tokens(checks, cost):
+    """Spend cost from every (buckets, key) in checks
+
+    Returns None if allowed, otherwise the seconds to wait. A cost above a bucket's
+    burst is capped to the burst so the request can still go through once it's full.
+    """
+    for buckets, key in checks:
+        allowed, retry_after = buckets.take(key, min(cost, buckets.burst))
+        if not allowed:
+            return retry_after
+    return None
+
+def retry_after_header(seconds):
+    """Whole seconds for a Retry-After header, never less than one"""
+    return str(max(1, math.ceil(seconds)))
@@ -0,0 +1,61 @@
+import time
+import threading
+from collections import OrderedDict
+
+import cv2
+
+FRAME_SIGNATURE_SIZE = 64
+# Sharpness is measured on a larger thumbnail: the 64px one averages away the fine
+# detail that separates an out-of-focus barcode from a readable one
+FRAME_SHARPNESS_SIZE = 256
+
+class FrameSignature:
+    """Cheap summary of a frame: a small grayscale thumbnail plus a focus measure"""
+
+    def __init__(self, cv_image):
+        gray = cv2.cvtColor(cv_image, cv2.COLOR_BGR2GRAY)
+        self.thumbnail = cv2.resize(gray, (FRAME_SIGNATURE_SIZE, FRAME_SIGNATURE_SIZE), interpolation=cv2.INTER_AREA)
+        sharpness_view = cv2.resize(gray, (FRAME_SHARPNESS_SIZE, FRAME_SHARPNESS_SIZE), interpolation=cv2.INTER_AREA)
+        # Variance of the Laplacian rises as edges get sharper
+        self.sharpness = cv2.Laplacian(sharpness_view, cv2.CV_64F).var()
+
+class ScanSessionFrames:
+    """Remembers the last frame each scan session failed to decode
+
+    A frame counts as unchanged when its thumbnail's mean absolute difference is
+    under diff_threshold and its sharpness moved by less than sharpness_change
+    (relative), so autofocus settling on the same scene still triggers a decode.
+    """
+
+    def __init__(self, max_sessions, diff_threshold=3.0, sharpness_change=0.2, max_skip_seconds=2.0, clock=time.monotonic):
+        self.max_sessions = max_sessions
+        self.diff_threshold = diff_threshold
+        self.sharpness_change = sharpness_change
+        self.max_skip_seconds = max_skip_seconds
+        self.clock = clock
+        self.sessions = OrderedDict()  # session -> (signature, timestamp of last full decode)
+        self.lock = threading.Lock()
+
+    def is_unchanged(self, session, signature):
+        """True if this frame is a near-duplicate of the last failed one and was decoded recently"""
+        with self.lock:
+            previous = self.sessions.get(session)
+            if previous is None:
+                return False
+            self.sessions.move_to_end(session)
+        last_signature, last_decoded = previous
+        if self.clock() - last_decoded > self.max_skip_seconds:
+            return False
+        if abs(signature.sharpness - last_signature.sharpness) > self.sharpness_change * max(last_signature.sharpness, 1.0):
+            return False
+        return cv2.absdiff(signature.thumbnail, last_signature.thumbnail).mean() < self.diff_threshold
+
+    def record(self, session, signature, found):
+        with self.lock:
+            if found:
+                self.sessions.pop(session, None)
+                return
+            self.sessions[session] = (signature, self.clock())
+            self.sessions.move_to_end(session)
+            while len(self.sessions) > self.max_sessions:
+                self.sessions.popitem(last=False)
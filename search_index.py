@@ -0,0 +1,261 @@
+import os
+import re
+import json
+import bisect
+import threading
+import unicodedata
+
+# Placeholder values the product sources fill in when a field is missing
+PLACEHOLDER_VALUES = {'unknown', 'unknown product', 'unknown brand', 'n/a'}
+
+def normalize_search_text(text):
+    """Lowercase and strip accents so 'Crème' matches 'creme'"""
+    text = unicodedata.normalize('NFKD', str(text or '').lower())
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+def tokenize(text):
+    return re.findall(r'\w+', normalize_search_text(text))
+
+def is_placeholder(value):
+    return ' '.join(str(value or '').lower().split()) in PLACEHOLDER_VALUES
+
+def within_edit_distance(a, b, max_distance):
+    """Levenshtein distance check that bails out once max_distance is exceeded"""
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+class ProductSearchIndex:
+    """In-memory inverted index over product names, brands and categories
+
+    With a catalog_path, newly indexed fields are appended to that JSON-lines file,
+    which is compacted once superseded lines outnumber the live records. Workers
+    sharing the file pick up each other's appends through refresh_catalog().
+    """
+
+    FIELD_WEIGHTS = {'name': 3.0, 'brand': 2.0, 'categories': 1.0}
+    COMPACT_MIN_LINES = 100
+
+    def __init__(self, catalog_path=None):
+        self.catalog_path = catalog_path
+        self.lock = threading.Lock()
+        self.products = {}     # barcode -> {'en': fields, '<lang>': fields, 'image_url': ...}
+        self.postings = {}     # token -> {barcode: weight}
+        self.doc_tokens = {}   # barcode -> set of tokens, for incremental re-indexing
+        self.vocabulary = []   # sorted tokens, for prefix lookups
+        self.typo_buckets = {} # (first letter, length) -> tokens, for typo lookups
+        self.catalog_lines = 0
+        self.catalog_lock = threading.Lock()
+        self.catalog_offset = 0   # bytes of the catalog already indexed
+        self.catalog_inode = None # changes when another worker compacts the file
+
+    def add(self, product_info, lang='en', persist=True):
+        """Index (or re-index) a product's searchable fields in the given language"""
+        barcode = str(product_info.get('barcode') or '')
+        if not barcode:
+            return
+        fields = {field: product_info.get(field) or '' for field in self.FIELD_WEIGHTS}
+
+        with self.lock:
+            entry = self.products.setdefault(barcode, {})
+            if entry.get(lang) == fields:
+                return
+            entry[lang] = fields
+            if product_info.get('image_url'):
+                entry['image_url'] = product_info['image_url']
+            self._reindex(barcode, entry)
+
+        if persist and self.catalog_path:
+            self._append_to_catalog(barcode, lang, fields, product_info.get('image_url', ''))
+
+    def _reindex(self, barcode, entry):
+        for token in self.doc_tokens.pop(barcode, ()):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(barcode, None)
+                if not postings:
+                    del self.postings[token]
+                    index = bisect.bisect_left(self.vocabulary, token)
+                    del self.vocabulary[index]
+                    self.typo_buckets[(token[0], len(token))].discard(token)
+
+        # A field that is a placeholder in English ('Unknown Brand') is a translated
+        # placeholder in every other language, so it is skipped everywhere
+        english = entry.get('en', {})
+        weights = {}
+        for lang, fields in entry.items():
+            if lang == 'image_url':
+                continue
+            for field, weight in self.FIELD_WEIGHTS.items():
+                if is_placeholder(fields[field]) or is_placeholder(english.get(field)):
+                    continue
+                for token in tokenize(fields[field]):
+                    weights[token] = max(weights.get(token, 0), weight)
+
+        for token, weight in weights.items():
+            if token not in self.postings:
+                self.postings[token] = {}
+                bisect.insort(self.vocabulary, token)
+                self.typo_buckets.setdefault((token[0], len(token)), set()).add(token)
+            self.postings[token][barcode] = weight
+        self.doc_tokens[barcode] = set(weights)
+
+    def _append_to_catalog(self, barcode, lang, fields, image_url):
+        try:
+            with open(self.catalog_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps({'barcode': barcode, 'lang': lang, 'image_url': image_url, **fields}, ensure_ascii=False) + '\n')
+            # Counts our own line, along with anything other workers appended before it
+            self.refresh_catalog()
+            with self.lock:
+                live_records = sum(len(entry) - ('image_url' in entry) for entry in self.products.values())
+                should_compact = self.catalog_lines > max(self.COMPACT_MIN_LINES, 2 * live_records)
+            if should_compact:
+                self.compact_catalog()
+        except (OSError, ValueError) as e:
+            print(f"Error writing search catalog: {e}")
+
+    def compact_catalog(self):
+        """Rewrite the catalog keeping only the latest line per (barcode, lang)
+
+        The file is re-read rather than rebuilt from memory so lines appended by
+        other workers survive.
+        """
+        with self.catalog_lock:
+            latest = {}
+            with open(self.catalog_path, encoding='utf-8') as f:
+                content = f.read().strip()
+            for record in self._parse_catalog(content):
+                latest[(str(record.get('barcode')), record.get('lang', 'en'))] = record
+            # Lines other workers appended since our last refresh would be skipped
+            # once the offset moves to the new file, so index them now
+            for record in latest.values():
+                self.add(record, record.get('lang', 'en'), persist=False)
+
+            tmp_path = f"{self.catalog_path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                for record in latest.values():
+                    f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                f.flush()
+                stat = os.fstat(f.fileno())
+            os.replace(tmp_path, self.catalog_path)
+            self.catalog_offset, self.catalog_inode = stat.st_size, stat.st_ino
+            with self.lock:
+                self.catalog_lines = len(latest)
+
+    def refresh_catalog(self):
+        """Index catalog lines appended since the last read, by this or any other worker
+
+        Costs one stat() when nothing changed. If the file was replaced by a
+        compaction it is re-read from the start; re-adding known records is a no-op.
+        Returns the number of records read.
+        """
+        if not self.catalog_path:
+            return 0
+        with self.catalog_lock:
+            try:
+                stat = os.stat(self.catalog_path)
+            except FileNotFoundError:
+                return 0
+            replaced = stat.st_ino != self.catalog_inode or stat.st_size < self.catalog_offset
+            if not replaced and stat.st_size == self.catalog_offset:
+                return 0
+
+            offset = 0 if replaced else self.catalog_offset
+            with open(self.catalog_path, 'rb') as f:
+                inode = os.fstat(f.fileno()).st_ino
+                f.seek(offset)
+                data = f.read()
+            if offset == 0 and data.lstrip().startswith(b'['):
+                # An imported JSON list rather than JSON lines
+                end = len(data)
+            else:
+                # Leave a line another worker is still writing for the next refresh
+                end = data.rfind(b'\n') + 1
+            records = self._parse_catalog(data[:end].decode('utf-8').strip())
+            for record in records:
+                self.add(record, record.get('lang', 'en'), persist=False)
+
+            self.catalog_offset, self.catalog_inode = offset + end, inode
+            with self.lock:
+                self.catalog_lines = len(records) if replaced else self.catalog_lines + len(records)
+        return len(records)
+
+    @staticmethod
+    def _parse_catalog(content):
+        if not content:
+            return []
+        if content.startswith('['):
+            return json.loads(content)
+        return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+    def load_catalog(self, path):
+        """Load products from a JSON list or JSON-lines file of product records"""
+        with open(path, encoding='utf-8') as f:
+            records = self._parse_catalog(f.read().strip())
+        for record in records:
+            self.add(record, record.get('lang', 'en'), persist=False)
+        return len(records)
+
+    def _match_token(self, token, is_last):
+        """Return {vocabulary token: match quality} for exact, prefix and typo-tolerant matches"""
+        matches = {}
+        if token in self.postings:
+            matches[token] = 1.0
+
+        # Treat the last query word as a prefix so results update as the user types
+        if is_last:
+            start = bisect.bisect_left(self.vocabulary, token)
+            for candidate in self.vocabulary[start:]:
+                if not candidate.startswith(token):
+                    break
+                matches.setdefault(candidate, 0.8)
+
+        if not matches and len(token) >= 4:
+            # Only tokens sharing the first letter and within max_distance in length can match
+            max_distance = 1 if len(token) < 8 else 2
+            for length in range(len(token) - max_distance, len(token) + max_distance + 1):
+                for candidate in self.typo_buckets.get((token[0], length), ()):
+                    if within_edit_distance(token, candidate, max_distance):
+                        matches[candidate] = 0.5
+        return matches
+
+    def search(self, query, lang='en', limit=20):
+        """Rank products containing every query word (allowing prefixes and typos)"""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self.lock:
+            scores = None
+            for i, token in enumerate(tokens):
+                token_scores = {}
+                for candidate, quality in self._match_token(token, i == len(tokens) - 1).items():
+                    for barcode, weight in self.postings[candidate].items():
+                        token_scores[barcode] = max(token_scores.get(barcode, 0), weight * quality)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {barcode: score + token_scores[barcode] for barcode, score in scores.items() if barcode in token_scores}
+                if not scores:
+                    return []
+
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            results = []
+            for barcode, score in ranked:
+                entry = self.products[barcode]
+                fields = entry.get(lang) or entry.get('en') or next(v for k, v in entry.items() if k != 'image_url')
+                results.append({
+                    'barcode': barcode,
+                    **fields,
+                    'image_url': entry.get('image_url', ''),
+                    'score': round(score, 3)
+                })
+            return results
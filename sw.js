@@ -0,0 +1,55 @@
+// Service worker: precaches the app shell so Fooderator starts instantly and
+// serves static assets stale-while-revalidate. Product responses are cached
+// separately in IndexedDB by app.js, so /api/ requests pass straight through.
+
+const CACHE_NAME = 'fooderator-static-v1';
+const STATIC_ASSETS = [
+    '/',
+    '/index.html',
+    '/styles.css',
+    '/app.js'
+];
+
+self.addEventListener('install', (event) => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(STATIC_ASSETS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', (event) => {
+    // Drop caches left behind by older versions
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(keys.filter(key => key !== CACHE_NAME).map(key => caches.delete(key))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', (event) => {
+    const url = new URL(event.request.url);
+    if (event.request.method !== 'GET' || url.origin !== self.location.origin || url.pathname.startsWith('/api/')) {
+        return;
+    }
+
+    event.respondWith(
+        caches.open(CACHE_NAME).then(async (cache) => {
+            const cached = await cache.match(event.request);
+            const network = fetch(event.request)
+                .then(response => {
+                    if (response.ok) {
+                        cache.put(event.request, response.clone());
+                    }
+                    return response;
+                })
+                .catch(() => cached || Response.error());
+            // Serve from cache immediately and refresh it in the background
+            if (cached) {
+                event.waitUntil(network);
+                return cached;
+            }
+            return network;
+        })
+    );
+});
@@ -0,0 +1,77 @@
+from ingredients import TranslationMemory, translate_ingredients
+
+
+class StubTranslator:
+    """Translates by upper-casing each line and records every upstream request"""
+
+    def __init__(self, merge_lines=False):
+        self.merge_lines = merge_lines
+        self.requests = []
+
+    def translate(self, text):
+        self.requests.append(text)
+        if self.merge_lines and '\n' in text:
+            return text.replace('\n', ' ').upper()
+        return text.upper()
+
+
+def make_memory(tmp_path):
+    return TranslationMemory(str(tmp_path / 'memory.sqlite'))
+
+
+def test_decimal_comma_percentage_stays_one_ingredient(tmp_path):
+    translator = StubTranslator()
+    result = translate_ingredients('sugar, cocoa 7,4%, milk', 'en', 'fr', translator, make_memory(tmp_path))
+    assert result == 'SUGAR, COCOA 7,4%, MILK'
+    assert translator.requests == ['sugar\ncocoa\nmilk']
+
+
+def test_e_numbers_are_not_translated(tmp_path):
+    translator = StubTranslator()
+    result = translate_ingredients('emulsifier: E322, e 471', 'en', 'fr', translator, make_memory(tmp_path))
+    assert result == 'EMULSIFIER: E322, e 471'
+    assert translator.requests == ['emulsifier']
+
+
+def test_nested_parentheses_keep_their_structure(tmp_path):
+    translator = StubTranslator()
+    ingredients = 'chocolate (cocoa mass, sugar (cane), emulsifier [soy lecithin])'
+    result = translate_ingredients(ingredients, 'en', 'fr', translator, make_memory(tmp_path))
+    assert result == 'CHOCOLATE (COCOA MASS, SUGAR (CANE), EMULSIFIER [SOY LECITHIN])'
+
+
+def test_capitalization_follows_the_original(tmp_path):
+    class LowerTranslator(StubTranslator):
+        def translate(self, text):
+            self.requests.append(text)
+            return text.replace('sugar', 'sucre').replace('milk', 'lait')
+
+    result = translate_ingredients('Sugar, milk', 'en', 'fr', LowerTranslator(), make_memory(tmp_path))
+    assert result == 'Sucre, lait'
+
+
+def test_line_count_mismatch_falls_back_to_one_request_per_item(tmp_path):
+    translator = StubTranslator(merge_lines=True)
+    result = translate_ingredients('sugar, milk', 'en', 'fr', translator, make_memory(tmp_path))
+    assert result == 'SUGAR, MILK'
+    assert translator.requests == ['sugar\nmilk', 'sugar', 'milk']
+
+
+def test_memory_is_reused_across_products_and_workers(tmp_path):
+    translator = StubTranslator()
+    translate_ingredients('Sugar, milk', 'en', 'fr', translator, make_memory(tmp_path))
+    translator.requests.clear()
+
+    # A fresh memory on the same file stands in for another worker
+    result = translate_ingredients('milk, salt', 'en', 'fr', translator, make_memory(tmp_path))
+    assert result == 'MILK, SALT'
+    assert translator.requests == ['salt']
+
+
+def test_memory_is_keyed_by_source_language(tmp_path):
+    memory = make_memory(tmp_path)
+    translate_ingredients('gift', 'en', 'fr', StubTranslator(), memory)
+
+    translator = StubTranslator()
+    translate_ingredients('gift', 'de', 'fr', translator, memory)
+    assert translator.requests == ['gift']
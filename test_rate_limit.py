@@ -0,0 +1,86 @@
+from rate_limit import MemoryTokenBuckets, request_cost, retry_after_header, take_tokens
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+COSTS = {'scan_barcode': 1, 'scan_barcode_batch': 1, 'get_product': 4}
+
+
+def make_buckets(rate=5, burst=10):
+    clock = FakeClock()
+    return MemoryTokenBuckets(rate, burst, clock=clock), clock
+
+
+def test_burst_is_allowed_then_rejected_with_wait():
+    buckets, _ = make_buckets()
+    assert [buckets.take('a', 4)[0] for _ in range(3)] == [True, True, False]
+    allowed, retry_after = buckets.take('a', 4)
+    assert not allowed
+    # 2 tokens left, 2 more needed at 5 tokens/second
+    assert retry_after == 0.4
+
+
+def test_tokens_refill_over_time_up_to_burst():
+    buckets, clock = make_buckets()
+    assert buckets.take('a', 10) == (True, 0)
+    assert not buckets.take('a', 1)[0]
+    clock.now += 0.2
+    assert buckets.take('a', 1) == (True, 0)
+    clock.now += 100
+    assert buckets.take('a', 10) == (True, 0)
+    assert not buckets.take('a', 1)[0]
+
+
+def test_clients_have_separate_buckets():
+    buckets, _ = make_buckets()
+    assert buckets.take('a', 10)[0]
+    assert buckets.take('b', 10)[0]
+
+
+def test_full_buckets_are_pruned_at_capacity():
+    buckets, clock = make_buckets()
+    buckets.MAX_CLIENTS = 2
+    buckets.take('a', 1)
+    buckets.take('b', 1)
+    clock.now += 10
+    buckets.take('c', 1)
+    assert set(buckets.buckets) == {'c'}
+
+
+def test_batch_cost_is_per_image():
+    assert request_cost(COSTS, 'scan_barcode_batch', {'images': ['x', 'y', 'z']}) == 3
+    assert request_cost(COSTS, 'scan_barcode_batch', {'images': []}) == 1
+    assert request_cost(COSTS, 'get_product', None) == 4
+
+
+def test_batch_cost_tolerates_non_object_bodies():
+    for body in (None, ['x', 'y'], 'images', 42, {'images': 'not a list'}):
+        assert request_cost(COSTS, 'scan_barcode_batch', body) == 1
+
+
+def test_take_tokens_stops_at_the_first_exhausted_bucket():
+    ip_buckets, _ = make_buckets(burst=100)
+    client_buckets, _ = make_buckets(burst=10)
+    checks = [(ip_buckets, '1.2.3.4'), (client_buckets, '1.2.3.4:abc')]
+    assert take_tokens(checks, 8) is None
+    assert take_tokens(checks, 8) == 1.2
+    assert take_tokens([(client_buckets, '1.2.3.4:other')], 8) is None
+
+
+def test_take_tokens_caps_cost_at_burst():
+    buckets, _ = make_buckets(burst=10)
+    assert take_tokens([(buckets, 'a')], 50) is None
+    assert take_tokens([(buckets, 'a')], 50) == 2.0
+
+
+def test_retry_after_header_rounds_up_to_whole_seconds():
+    assert retry_after_header(0) == '1'
+    assert retry_after_header(0.4) == '1'
+    assert retry_after_header(1.2) == '2'
+    assert retry_after_header(3) == '3'
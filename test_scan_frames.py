@@ -0,0 +1,89 @@
+import cv2
+import numpy as np
+
+from scan_frames import FrameSignature, ScanSessionFrames
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def barcode_frame(shift=0):
+    """640x480 BGR frame of random vertical bars, like a barcode filling the view"""
+    rng = np.random.default_rng(0)
+    bars = (rng.integers(0, 2, 160).repeat(3)[:640] * 255).astype(np.uint8)
+    gray = np.tile(np.roll(bars, shift), (480, 1))
+    gray[:, :40] = 255
+    gray[:, 600:] = 255
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def make_frames():
+    clock = FakeClock()
+    return ScanSessionFrames(max_sessions=10, clock=clock), clock
+
+
+def test_unknown_session_is_decoded():
+    frames, _ = make_frames()
+    assert not frames.is_unchanged('s', FrameSignature(barcode_frame()))
+
+
+def test_near_duplicate_of_failed_frame_is_skipped():
+    frames, clock = make_frames()
+    frame = barcode_frame()
+    frames.record('s', FrameSignature(frame), found=False)
+    clock.now = 0.3
+    noisy = cv2.add(frame, np.full(frame.shape, 1, dtype=np.uint8))
+    assert frames.is_unchanged('s', FrameSignature(noisy))
+
+
+def test_motion_is_decoded():
+    frames, clock = make_frames()
+    frames.record('s', FrameSignature(barcode_frame()), found=False)
+    clock.now = 0.3
+    assert not frames.is_unchanged('s', FrameSignature(barcode_frame(shift=200)))
+
+
+def test_focus_change_is_decoded():
+    frames, clock = make_frames()
+    sharp = barcode_frame()
+    blurry = cv2.GaussianBlur(sharp, (0, 0), 0.5)
+    blurry_signature, sharp_signature = FrameSignature(blurry), FrameSignature(sharp)
+    # The thumbnails alone are too similar to tell the frames apart
+    assert cv2.absdiff(blurry_signature.thumbnail, sharp_signature.thumbnail).mean() < frames.diff_threshold
+
+    frames.record('s', blurry_signature, found=False)
+    clock.now = 0.3
+    assert not frames.is_unchanged('s', sharp_signature)
+
+
+def test_decode_is_forced_after_max_skip_seconds():
+    frames, clock = make_frames()
+    signature = FrameSignature(barcode_frame())
+    frames.record('s', signature, found=False)
+    clock.now = 1.9
+    assert frames.is_unchanged('s', signature)
+    clock.now = 2.1
+    assert not frames.is_unchanged('s', signature)
+
+
+def test_success_clears_session():
+    frames, clock = make_frames()
+    signature = FrameSignature(barcode_frame())
+    frames.record('s', signature, found=False)
+    frames.record('s', signature, found=True)
+    clock.now = 0.3
+    assert not frames.is_unchanged('s', signature)
+    assert 's' not in frames.sessions
+
+
+def test_sessions_are_bounded():
+    frames, _ = make_frames()
+    signature = FrameSignature(barcode_frame())
+    for i in range(15):
+        frames.record(f's{i}', signature, found=False)
+    assert list(frames.sessions) == [f's{i}' for i in range(5, 15)]
@@ -0,0 +1,138 @@
+import json
+
+from search_index import ProductSearchIndex
+
+
+def make_index(catalog_path=None):
+    index = ProductSearchIndex(catalog_path)
+    index.add({'barcode': '1', 'name': 'Nutella Hazelnut Spread', 'brand': 'Ferrero', 'categories': 'Spreads'})
+    index.add({'barcode': '2', 'name': 'Coca-Cola Classic', 'brand': 'Coca-Cola', 'categories': 'Sodas'})
+    index.add({'barcode': '3', 'name': 'Hazelnut Wafers', 'brand': 'Loacker', 'categories': 'Biscuits'})
+    return index
+
+
+def barcodes(results):
+    return [r['barcode'] for r in results]
+
+
+def test_prefix_match_on_last_word():
+    index = make_index()
+    assert barcodes(index.search('nute')) == ['1']
+    assert barcodes(index.search('coca cla')) == ['2']
+
+
+def test_typo_match():
+    index = make_index()
+    assert barcodes(index.search('nutela')) == ['1']
+    assert barcodes(index.search('hazlenut spread')) == ['1']
+
+
+def test_all_query_words_must_match():
+    index = make_index()
+    assert set(barcodes(index.search('hazelnut'))) == {'1', '3'}
+    assert barcodes(index.search('hazelnut wafers')) == ['3']
+    assert index.search('hazelnut cola') == []
+
+
+def test_name_hits_rank_above_category_hits():
+    index = ProductSearchIndex()
+    index.add({'barcode': 'a', 'name': 'Cookie Box', 'brand': 'Acme', 'categories': 'Spreads'})
+    index.add({'barcode': 'b', 'name': 'Spreads Sampler', 'brand': 'Acme', 'categories': 'Gifts'})
+    assert barcodes(index.search('spreads')) == ['b', 'a']
+
+
+def test_reindexing_removes_old_tokens():
+    index = make_index()
+    index.add({'barcode': '2', 'name': 'Pepsi', 'brand': 'PepsiCo', 'categories': 'Sodas'})
+    assert index.search('coca') == []
+    assert 'coca' not in index.vocabulary
+    assert barcodes(index.search('pepsi')) == ['2']
+
+
+def test_translated_fields_are_searchable_in_their_language():
+    index = make_index()
+    index.add({'barcode': '1', 'name': 'Pâte à tartiner Nutella', 'brand': 'Ferrero', 'categories': 'Pâtes'}, 'fr')
+    results = index.search('pate', 'fr')
+    assert barcodes(results) == ['1']
+    assert results[0]['name'] == 'Pâte à tartiner Nutella'
+    assert index.search('nutella', 'de')[0]['name'] == 'Nutella Hazelnut Spread'
+
+
+def test_placeholder_values_are_not_indexed():
+    index = make_index()
+    index.add({'barcode': '9', 'name': 'Unknown Product', 'brand': 'Unknown Brand', 'categories': 'Sodas'})
+    index.add({'barcode': '9', 'name': 'Producto desconocido', 'brand': 'Marca desconocida', 'categories': 'Refrescos'}, 'es')
+    assert index.search('unknown') == []
+    assert index.search('desconocido', 'es') == []
+    assert '9' in barcodes(index.search('sodas'))
+
+
+def test_catalog_round_trip(tmp_path):
+    catalog = tmp_path / 'catalog.jsonl'
+    index = make_index(str(catalog))
+    index.add({'barcode': '1', 'name': 'Pâte à tartiner Nutella', 'brand': 'Ferrero', 'categories': 'Pâtes'}, 'fr')
+
+    restored = ProductSearchIndex(str(catalog))
+    assert restored.load_catalog(str(catalog)) == 4
+    assert barcodes(restored.search('nutella')) == ['1']
+    assert barcodes(restored.search('pate', 'fr')) == ['1']
+    assert barcodes(restored.search('wafers')) == ['3']
+
+
+def test_catalog_is_compacted(tmp_path):
+    catalog = tmp_path / 'catalog.jsonl'
+    index = ProductSearchIndex(str(catalog))
+    for i in range(ProductSearchIndex.COMPACT_MIN_LINES + 1):
+        index.add({'barcode': '1', 'name': f'Product revision {i}', 'brand': 'Acme', 'categories': ''})
+
+    lines = catalog.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])['name'] == f'Product revision {ProductSearchIndex.COMPACT_MIN_LINES}'
+
+
+def test_typo_buckets_follow_reindexing():
+    index = make_index()
+    index.add({'barcode': '3', 'name': 'Almond Biscuits', 'brand': 'Loacker', 'categories': 'Biscuits'})
+    assert 'wafers' not in index.typo_buckets[('w', 6)]
+    assert index.search('wafrs') == []
+    assert barcodes(index.search('almnd')) == ['3']
+
+
+def test_workers_sharing_a_catalog_see_each_others_products(tmp_path):
+    catalog = str(tmp_path / 'catalog.jsonl')
+    first = ProductSearchIndex(catalog)
+    second = ProductSearchIndex(catalog)
+    first.add({'barcode': '1', 'name': 'Nutella Hazelnut Spread', 'brand': 'Ferrero', 'categories': 'Spreads'})
+    assert second.search('nutella') == []
+
+    assert second.refresh_catalog() == 1
+    assert barcodes(second.search('nutella')) == ['1']
+    assert second.refresh_catalog() == 0
+
+
+def test_refresh_after_another_worker_compacts(tmp_path):
+    catalog = str(tmp_path / 'catalog.jsonl')
+    first = ProductSearchIndex(catalog)
+    second = ProductSearchIndex(catalog)
+    first.add({'barcode': '1', 'name': 'Old Name', 'brand': 'Acme', 'categories': ''})
+    second.refresh_catalog()
+    first.add({'barcode': '1', 'name': 'New Name', 'brand': 'Acme', 'categories': ''})
+    first.compact_catalog()
+
+    assert second.refresh_catalog() == 1
+    assert second.search('old') == []
+    assert barcodes(second.search('new')) == ['1']
+    assert second.catalog_lines == 1
+
+
+def test_refresh_skips_a_partially_written_line(tmp_path):
+    catalog = tmp_path / 'catalog.jsonl'
+    record = json.dumps({'barcode': '1', 'lang': 'en', 'name': 'Nutella', 'brand': '', 'categories': ''})
+    catalog.write_text(record + '\n' + record[:10], encoding='utf-8')
+    index = ProductSearchIndex(str(catalog))
+    assert index.refresh_catalog() == 1
+
+    with open(catalog, 'a', encoding='utf-8') as f:
+        f.write(record.replace('"1"', '"2"')[10:] + '\n')
+    assert index.refresh_catalog() == 1
+    assert set(barcodes(index.search('nutella'))) == {'1', '2'}